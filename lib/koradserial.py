@@ -24,7 +24,7 @@ https://gist.github.com/k-nowicki/5379272
 """
 from __future__ import print_function, unicode_literals
 from enum import Enum
-from time import sleep
+from time import monotonic, sleep
 import serial
 
 __all__ = ['KoradSerial', 'ChannelMode', 'OnOffState', 'Tracking']
@@ -183,6 +183,20 @@ class KoradSerial(object):
             result = self.__serial.send_receive("VOUT{0}?".format(self.number), fixed_length=5)
             return float_or_none(result)
 
+        @property
+        def output_voltage_and_current(self):
+            """ Retrieve this channel's current output voltage and current in a single exchange.
+
+            Both queries are sent before either response is read, so the voltage response is not read before the
+            current query goes out. The supply still needs the command delay between both queries.
+
+            :return: Volts, Amperes
+            :rtype: (float or None, float or None)
+            """
+            voltage, current = self.__serial.send_receive_many(
+                ["VOUT{0}?".format(self.number), "IOUT{0}?".format(self.number)], fixed_length=5)
+            return float_or_none(voltage), float_or_none(current)
+
     class Memory(object):
         """ Wrap a memory setting. """
 
@@ -220,11 +234,23 @@ class KoradSerial(object):
         There are some quirky things in communication. They go here.
         """
 
-        def __init__(self, port, debug=False):
+        def __init__(self, port, debug=False, baudrate=9600, command_delay=0.1, low_latency=False):
             super(KoradSerial.Serial, self).__init__()
 
             self.debug = debug
-            self.port = serial.Serial(port, 9600, timeout=1)
+            self.port = serial.Serial(port, baudrate, timeout=1)
+
+            # Ask the driver to pass on received bytes right away instead of buffering them (Linux only)
+            if low_latency:
+                try:
+                    self.port.set_low_latency_mode(True)
+                except (AttributeError, NotImplementedError, ValueError) as e:
+                    if self.debug:
+                        print("low latency mode not available: {0}".format(e))
+
+            # The power supply has no command terminator, it needs a quiet period between commands instead
+            self.command_delay = command_delay
+            self.last_send_time = None
 
         def read_character(self):
             c = self.port.read(1).decode('ascii')
@@ -255,17 +281,39 @@ class KoradSerial(object):
         def send(self, text):
             if self.debug:
                 print("_send: ", text)
-            sleep(0.1)
+            # Only wait for what remains of the command delay, time spent reading responses counts too
+            if self.last_send_time is not None:
+                remaining = self.last_send_time + self.command_delay - monotonic()
+                if remaining > 0:
+                    sleep(remaining)
             self.port.write(text.encode('ascii'))
+            # Wait until the command has actually been transmitted, the quiet period starts after it
+            self.port.flush()
+            self.last_send_time = monotonic()
 
         def send_receive(self, text, fixed_length=None):
             self.send(text)
             return self.read_string(fixed_length)
 
-    def __init__(self, port, debug=False):
+        def send_receive_many(self, texts, fixed_length=None):
+            """ Send several queries back-to-back, then read their responses in order.
+
+            :return: list of str
+            """
+            for text in texts:
+                self.send(text)
+            return [self.read_string(fixed_length) for _ in texts]
+
+    def __init__(self, port, debug=False, baudrate=9600, command_delay=0.1, low_latency=False):
+        """ Open the serial port.
+
+        :param baudrate: Serial baud rate, most models only support 9600
+        :param command_delay: Minimum time in seconds between two commands
+        :param low_latency: Put the serial port in low latency mode, if supported
+        """
         super(KoradSerial, self).__init__()
 
-        self.__serial = KoradSerial.Serial(port, debug)
+        self.__serial = KoradSerial.Serial(port, debug, baudrate, command_delay, low_latency)
 
         # Channels: adjust voltage and current,  discover current output voltage.
         self.channels = [KoradSerial.Channel(self.__serial, i) for i in range(1, 3)]
@@ -1,19 +1,29 @@
 #!/usr/bin/python3
 import sys
-import csv
 import argparse
 import time
-import math
-import datetime
-import curses
+import itertools
+import queue
+import threading
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from dataclasses import dataclass
 from lib.koradserial import KoradSerial
 from apa102_pi.driver import apa102
 
 VOLTAGE_ABSOLUTE_MAX = 5.5
-COLOR_BITSHIFTS = [16, 8, 0] # RGB
+NUM_COLORS = 3 # RGB
+CSV_BATCH_SIZE = 1000 # rows
+CSV_FILE_BUFFER_SIZE = 1 << 20 # bytes
+OUTPUT_QUEUE_SIZE = 1 << 16 # rows
+OUTPUT_QUEUE_TIMEOUT = 0.1 # s
+CSV_HEADER = b'Brightness (31),Red (255),Green (255),Blue (255),Voltage (V),Current (mA)\r\n'
+CSV_ROW_FORMAT = b'%d,%d,%d,%d,%s,%s\r\n'
+SETTLE_POLL_INTERVAL = 0.005 # s
+STATUS_INTERVAL = 0.1 # s
+STATUS_LOG_INTERVAL = 60 # s
 
 class Default:
     def __init__(self, value):
@@ -37,31 +47,24 @@ class ColorRange(ABC):
 
 class IndividualColorsRange(ColorRange):
     def __iter__(self):
-        for color_bitshift in COLOR_BITSHIFTS:
-            for cur_value in self.value_range:
-                yield (cur_value << color_bitshift)
+        zeros = itertools.repeat(0)
+        return itertools.chain(zip(self.value_range, zeros, zeros),
+                               zip(zeros, self.value_range, zeros),
+                               zip(zeros, zeros, self.value_range))
 
     def __len__(self):
-        return len(self.value_range) * len(COLOR_BITSHIFTS)
+        return len(self.value_range) * NUM_COLORS
 
 class WhiteOnlyRange(ColorRange):
     def __iter__(self):
-        for cur_value in self.value_range:
-            yield ((cur_value << COLOR_BITSHIFTS[0]) | 
-                   (cur_value << COLOR_BITSHIFTS[1]) |
-                   (cur_value << COLOR_BITSHIFTS[2]))
+        return zip(self.value_range, self.value_range, self.value_range)
     
     def __len__(self):
         return len(self.value_range)
 
 class FullRainbowRange(ColorRange):
     def __iter__(self):
-        for red in self.value_range:
-            for green in self.value_range:
-                for blue in self.value_range:
-                    yield ((red << COLOR_BITSHIFTS[0]) | 
-                           (green << COLOR_BITSHIFTS[1]) |
-                           (blue << COLOR_BITSHIFTS[2]))
+        return itertools.product(self.value_range, repeat=NUM_COLORS)
     
     def __len__(self):
         return pow(len(self.value_range), 3)
@@ -81,14 +84,186 @@ class Mode(Enum):
 
 @dataclass
 class Context:
-    def __init__(self, stdscr, csv_writer, strip, psu_channel, num_leds, settle_time, current_offset):
-        self.stdscr = stdscr
-        self.csv_writer = csv_writer
+    def __init__(self, output, strip, strip_executor, psu_channel, num_leds, min_settle_time, settle_time, settle_tolerance, current_offset):
+        self.output = output
         self.strip = strip
+        self.strip_executor = strip_executor
         self.psu_channel = psu_channel
         self.num_leds = num_leds
+        self.min_settle_time = min_settle_time
         self.settle_time = settle_time
+        self.settle_tolerance = settle_tolerance
         self.current_offset = current_offset
+        self.strip_frame = bytearray(4 + 4 * num_leds + 4 + (num_leds + 15) // 16)
+        self.strip_color = None
+        self.voltage_setpoint = None
+        self.black_measurements = {}
+        self.last_status_time = 0.0
+
+def csv_field(value):
+    return b'' if value is None else repr(value).encode()
+
+@dataclass
+class Status:
+    voltage_setpoint: float
+    brightness: int
+    red: int
+    green: int
+    blue: int
+    voltage: float
+    current: float
+    progress: float # %
+    time_remaining: int # s
+
+def format_quantity(value, format_spec, unit):
+    return 'N/A' if value is None else f'{value:{format_spec}} {unit}'
+
+def format_duration(seconds):
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f'{hours:2}:{minutes:02}:{seconds:02}'
+
+class CursesDisplay:
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+
+    def show(self, line_no, text):
+        self.stdscr.addstr(line_no, 0, text)
+        self.stdscr.refresh()
+
+    def show_status(self, status):
+        self.show(2, f'Voltage setpoint: {format_quantity(status.voltage_setpoint, "4.2f", "V")}\n'
+                     f'Color: R{status.red:<3} G{status.green:<3} B{status.blue:<3}\t'
+                     f'Brightness: {status.brightness:2}/31\n'
+                     f'Voltage: {format_quantity(status.voltage, "4.2f", "V")}\t\t'
+                     f'Current: {format_quantity(status.current, "5.2f", "mA")}\n'
+                     f'Progress: {status.progress:6.2f}%\t'
+                     f'Time remaining: {format_duration(status.time_remaining)}')
+
+    def close(self):
+        pass
+
+class StreamDisplay:
+    # Prints each update as a single line. On a terminal the status line is overwritten in place,
+    # otherwise (e.g. when logging to a file) a line is only printed for every whole percent of
+    # progress, or once every STATUS_LOG_INTERVAL.
+    def __init__(self, stream):
+        self.stream = stream
+        self.is_tty = stream.isatty()
+        self.status_shown = False
+        self.logged_percent = None
+        self.last_log_time = 0.0
+
+    def show(self, line_no, text):
+        self.close()
+        self.stream.write(text + '\n')
+        self.stream.flush()
+
+    def show_status(self, status):
+        # Compact, with the most important fields first, as the line is cut to the terminal width
+        line = (f'{status.progress:6.2f}% | {format_duration(status.time_remaining).strip()} left | '
+                f'{format_quantity(status.current, "5.2f", "mA")} at {format_quantity(status.voltage, "4.2f", "V")} | '
+                f'Setpoint: {format_quantity(status.voltage_setpoint, "4.2f", "V")} | '
+                f'R{status.red} G{status.green} B{status.blue} | Brightness: {status.brightness}/31')
+        if self.is_tty:
+            # A line that wraps could not be overwritten in place anymore
+            self.stream.write('\r' + line[:self.terminal_width() - 1] + '\x1b[K')
+            self.status_shown = True
+        else:
+            now = time.monotonic()
+            percent = int(status.progress)
+            if percent == self.logged_percent and now - self.last_log_time < STATUS_LOG_INTERVAL:
+                return
+            self.logged_percent = percent
+            self.last_log_time = now
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def terminal_width(self):
+        try:
+            return os.get_terminal_size(self.stream.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            return 80
+
+    def close(self):
+        if self.status_shown:
+            self.stream.write('\n')
+            self.status_shown = False
+
+class OutputWriter(threading.Thread):
+    # Writes CSV rows and status updates in the background, so that they overlap
+    # with the settle time of the next measurement
+    def __init__(self, display, csv_file):
+        super().__init__()
+        self.display = display
+        self.csv_file = csv_file
+        self.csv_rows = []
+        # Bounded, so a stalled disk cannot use up all memory
+        self.queue = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+        # Exception that stopped the thread, re-raised in the main thread
+        self.error = None
+
+    def write(self, row, status=None):
+        self.put((row, status))
+
+    def close(self):
+        if self.is_alive():
+            try:
+                self.put(None)
+            except Exception:
+                # The thread has stopped, its error is raised below
+                pass
+        self.join()
+        self.raise_error()
+
+    def put(self, item):
+        # Don't block forever on a full queue if the thread stops while waiting
+        while True:
+            self.raise_error()
+            if not self.is_alive():
+                raise RuntimeError("Output writer has stopped")
+            try:
+                self.queue.put(item, timeout=OUTPUT_QUEUE_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+
+    def raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                (row, status) = item
+
+                self.csv_rows.append(row)
+                if len(self.csv_rows) >= CSV_BATCH_SIZE:
+                    self.flush_csv_rows()
+
+                if status is not None:
+                    self.display.show_status(status)
+        except Exception as e:
+            self.error = e
+        finally:
+            # Write out the rows measured so far, even if updating the display failed
+            try:
+                self.flush_csv_rows()
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+
+    def flush_csv_rows(self):
+        # All fields are numbers, so they never need quoting. Invalid PSU readings (None) are
+        # written as empty fields, like csv.writer did.
+        self.csv_file.write(b''.join(
+            CSV_ROW_FORMAT % (brightness, red, green, blue, csv_field(voltage), csv_field(current))
+            for (brightness, red, green, blue, voltage, current) in self.csv_rows))
+        self.csv_file.flush()
+        self.csv_rows.clear()
 
 class RangeInc:
     def __init__(self, start, stop, step):
@@ -101,110 +276,144 @@ class RangeInc:
         self.stop = stop
         self.step = step
 
+        # Values are computed once, as the range is iterated over many times
+        self.values = []
+        value = start
+        while (value * 1.001  < stop):
+            self.values.append(value)
+            value = start + len(self.values) * step
+        self.values.append(stop)
+
     def __iter__(self):
-        i = 0
-        value = self.start
-        while (value * 1.001  < self.stop):
-            yield value
-            i += 1
-            value = self.start + i * self.step
-        yield self.stop
+        return iter(self.values)
 
     def __len__(self):
-        return math.ceil((self.stop - self.start) / self.step) + 1 
-
-def get_red(rgb_color):
-    return int((rgb_color & 0xFF0000) >> 16)
-  
-def get_green(rgb_color):
-    return int((rgb_color & 0x00FF00) >> 8)
-    
-def get_blue(rgb_color):
-    return int(rgb_color & 0x0000FF)
-
-def set_strip_color(strip, num_leds, red, green, blue, global_brightness):
-    # Set color of each LED
+        return len(self.values)
+
+def set_strip_color(ctx, red, green, blue, global_brightness):
+    # Nothing to do if the strip is already showing this color
+    strip_color = (global_brightness, red, green, blue)
+    if strip_color == ctx.strip_color:
+        return
+
+    # Update the SPI payload: start frame, a 4-byte frame for each LED and an end frame that clocks
+    # the data through to the last LED. Only the bytes of the fields that changed are rewritten,
+    # e.g. just the brightness byte of each LED frame when stepping through brightness.
+    strip = ctx.strip
     strip.global_brightness = global_brightness
-    for led in range(0, num_leds):
-        strip.set_pixel(led, red, green, blue)
-    
-    # Program strip
-    strip.show()
+    leds_end = 4 + 4 * ctx.num_leds
+    offsets = (0, strip.rgb[0], strip.rgb[1], strip.rgb[2])
+    led_frame = (strip.LED_START | (global_brightness & 0b00011111), red, green, blue)
+    previous_color = ctx.strip_color or (None,) * 4
+    for (offset, byte, value, previous_value) in zip(offsets, led_frame, strip_color, previous_color):
+        if value != previous_value:
+            ctx.strip_frame[4 + offset:leds_end:4] = bytes([byte]) * ctx.num_leds
+
+    # Program strip in a single SPI transfer
+    strip.spi.write(ctx.strip_frame)
+    ctx.strip_color = strip_color
+
+def measure_when_stable(ctx):
+    # Wait the minimum settle time, then poll the output current until two successive readings agree
+    # or the settle time has passed. Without a settle time a single reading is taken after the minimum
+    # wait. The output voltage is only read once the current has settled.
+    time.sleep(ctx.min_settle_time)
+    if ctx.settle_time <= 0:
+        return ctx.psu_channel.output_voltage_and_current
+    deadline = time.monotonic() + ctx.settle_time
+    current = ctx.psu_channel.output_current
+    while True:
+        time.sleep(SETTLE_POLL_INTERVAL)
+        previous_current = current
+        current = ctx.psu_channel.output_current
+        # A missing (timed out or garbled) reading never counts as settled
+        settled = (current is not None and previous_current is not None
+                   and abs(current - previous_current) * 1000.0 < ctx.settle_tolerance)
+        if settled or time.monotonic() >= deadline:
+            break
+    return (ctx.psu_channel.output_voltage, current)
 
 def do_measurement(ctx, voltage_setpoint, brightness, red, green, blue):
-    # Set voltage
-    if voltage_setpoint is not None:
+    # Black frames at the same brightness and voltage are identical (e.g. the zero value of each
+    # channel in individual mode), so only measure them once
+    black_key = (voltage_setpoint, brightness) if red == green == blue == 0 else None
+    if black_key in ctx.black_measurements:
+        return ctx.black_measurements[black_key]
+
+    # Set voltage, unless it is already set, and set strip color. When both change, the strip is
+    # programmed on a worker thread while the voltage command is sent, as both must be done before settling.
+    voltage_changed = voltage_setpoint is not None and voltage_setpoint != ctx.voltage_setpoint
+    color_changed = (brightness, red, green, blue) != ctx.strip_color
+    if voltage_changed and color_changed:
+        strip_update = ctx.strip_executor.submit(set_strip_color, ctx, red, green, blue, brightness)
         ctx.psu_channel.voltage = voltage_setpoint
-
-    # Set strip color
-    set_strip_color(ctx.strip, ctx.num_leds, red, green, blue, brightness)
-    
-    # Wait for current to stabilize
-    time.sleep(ctx.settle_time)
-    
-    # Measure voltage and current
-    voltage = ctx.psu_channel.output_voltage
-    current = (ctx.psu_channel.output_current * 1000.0 - ctx.current_offset) / ctx.num_leds
+        ctx.voltage_setpoint = voltage_setpoint
+        strip_update.result()
+    elif voltage_changed:
+        ctx.psu_channel.voltage = voltage_setpoint
+        ctx.voltage_setpoint = voltage_setpoint
+    elif color_changed:
+        set_strip_color(ctx, red, green, blue, brightness)
     
-    # Write measurement to file
-    ctx.csv_writer.writerow([brightness, red, green, blue, voltage, current])
+    # Wait for current to stabilize and measure voltage and current
+    (voltage, output_current) = measure_when_stable(ctx)
+    # Keep a missing reading, it is written as an empty field
+    current = None if output_current is None else (output_current * 1000.0 - ctx.current_offset) / ctx.num_leds
+    if black_key is not None:
+        ctx.black_measurements[black_key] = (voltage, current)
     return (voltage, current)
 
-def run_measurement_iteration(ctx, voltage_setpoint, brightness, rgb_color, i, nb_iterations, start_time):
-    # Calculate RGB color
-    red = get_red(rgb_color)
-    green = get_green(rgb_color)
-    blue = get_blue(rgb_color)
-
+def run_measurement_iteration(ctx, voltage_setpoint, brightness, red, green, blue, i, nb_iterations, start_time):
     # Run measurement
     (measured_voltage, measured_current) = do_measurement(ctx, voltage_setpoint, brightness, red, green, blue)
+    row = [brightness, red, green, blue, measured_voltage, measured_current]
+
+    # Only update the status a few times per second, and after the last measurement
+    now = time.monotonic()
+    if now - ctx.last_status_time < STATUS_INTERVAL and i != nb_iterations:
+        ctx.output.write(row)
+        return
+    ctx.last_status_time = now
 
     # Progress calculations
     progress = i / nb_iterations * 100
-    time_elapsed = datetime.datetime.now() - start_time
+    time_elapsed = now - start_time
     time_per_iteration = time_elapsed / i
-    time_remaining = (nb_iterations - i) * time_per_iteration
-    hours_remaining, remainder = divmod(time_remaining.total_seconds(), 3600)
-    minutes_remaining, seconds_remaining = divmod(remainder, 60)
-
-    # Print status
-    voltage_setpoint_str = 'N/A' if voltage_setpoint is None else '{:4.2f} V'.format(voltage_setpoint)
-    ctx.stdscr.addstr(2, 0, f'Voltage setpoint: {voltage_setpoint_str}')
-    ctx.stdscr.addstr(3, 0, f'Color: R{red:<3} G{green:<3} B{blue:<3}\t'
-                            f'Brightness: {brightness:2}/31')
-    ctx.stdscr.addstr(4, 0, f'Voltage: {measured_voltage:4.2f} V\t\t'
-                            f'Current: {measured_current:5.2f} mA')
-    ctx.stdscr.addstr(5, 0, f'Progress: {progress:6.2f}%\t'
-                            f'Time remaining: {int(hours_remaining):2}:{int(minutes_remaining):02}:{int(seconds_remaining):02}')
-    ctx.stdscr.refresh()
+    time_remaining = int((nb_iterations - i) * time_per_iteration)
 
-def run_measurements(ctx, mode, brightness_range, value_range, voltage_range):
-    # Write header
-    ctx.csv_writer.writerow(['Brightness (31)', 'Red (255)', 'Green (255)', 'Blue (255)', 'Voltage (V)', 'Current (mA)'])
+    # Write measurement to file and print status
+    ctx.output.write(row, Status(voltage_setpoint, brightness, red, green, blue,
+                                 measured_voltage, measured_current, progress, time_remaining))
 
+def run_measurements(ctx, mode, brightness_range, value_range, voltage_range):
     i = 0
     color_range = mode.color_range(value_range)
     nb_iterations = len(voltage_range) * len(brightness_range) * len(color_range)
-    start_time = datetime.datetime.now()
-    for voltage in voltage_range:
-        for brightness in brightness_range:
-            for rgb_color in color_range:
+    start_time = time.monotonic()
+    # Sweep the voltage innermost, so the strip only needs to be reprogrammed once per color
+    for brightness in brightness_range:
+        for (red, green, blue) in color_range:
+            for voltage in voltage_range:
                 i += 1
-                run_measurement_iteration(ctx, voltage, brightness, rgb_color, i, nb_iterations, start_time)
+                run_measurement_iteration(ctx, voltage, brightness, red, green, blue, i, nb_iterations, start_time)
 
-def run(args, stdscr):
+def run(args, display):
     mode_str = args.mode
     psu_port = args.psu_port
-    psu_channel_no = int(args.psu_channel)
+    psu_channel_no = args.psu_channel
     mosi_pin = args.strip_mosi
     sclk_pin = args.strip_sclk
     rgb_order = args.strip_rgb_order
-    current_offset = int(args.current_offset)
+    spi_speed_hz = args.strip_spi_speed_hz
+    current_offset = args.current_offset
     
-    num_leds = int(args.num_leds)
-    brightness_range = RangeInc(int(args.min_brightness), int(args.max_brightness), int(args.brightness_step))
-    value_range = RangeInc(int(args.min_value), int(args.max_value), int(args.value_step))
-    settle_time = int(args.settle_time_ms) / 1000.0
+    num_leds = args.num_leds
+    brightness_range = RangeInc(args.min_brightness, args.max_brightness, args.brightness_step)
+    value_range = RangeInc(args.min_value, args.max_value, args.value_step)
+    min_settle_time = args.min_settle_time_ms / 1000.0
+    settle_time = args.settle_time_ms / 1000.0
+    settle_tolerance = args.settle_tolerance
+    psu_command_delay = args.psu_command_delay_ms / 1000.0
    
     if isinstance(args.max_voltage, Default):
         args.max_voltage = args.min_voltage
@@ -213,7 +422,7 @@ def run(args, stdscr):
     if isinstance(args.min_voltage, Default):
         voltage_range = [None]
     else:
-        voltage_range = RangeInc(float(args.min_voltage), float(args.max_voltage), float(args.voltage_step))
+        voltage_range = RangeInc(args.min_voltage, args.max_voltage, args.voltage_step)
 
     if float(args.max_voltage) > VOLTAGE_ABSOLUTE_MAX:
         raise ValueError("Max voltage out of range")
@@ -222,21 +431,27 @@ def run(args, stdscr):
         raise ValueError("Invalid mode specified")
     mode = Mode[mode_str.upper()]
 
-    with open(args.output_file, mode='w' if args.force else 'x') as csv_file:
-        strip = apa102.APA102(num_led=num_leds, mosi=mosi_pin, sclk=sclk_pin, order=rgb_order)
+    with open(args.output_file, mode='wb' if args.force else 'xb', buffering=CSV_FILE_BUFFER_SIZE) as csv_file:
+        strip = apa102.APA102(num_led=num_leds, mosi=mosi_pin, sclk=sclk_pin, order=rgb_order, bus_speed_hz=spi_speed_hz)
         try:
-            with KoradSerial(psu_port) as power_supply:
-                stdscr.addstr(0, 0, 'PSU model: {}'.format(power_supply.model))
-                stdscr.refresh()
+            with KoradSerial(psu_port, command_delay=psu_command_delay, low_latency=True) as power_supply:
+                display.show(0, 'PSU model: {}'.format(power_supply.model))
     
-                csv_file.write('# Command:, {}\r\n'.format(" ".join(sys.argv[:])))
-                csv_file.write('# PSU model:, {}\r\n'.format(power_supply.model))
-                csv_file.write('\r\n')
+                csv_file.write('# Command:, {}\r\n'.format(" ".join(sys.argv[:])).encode())
+                csv_file.write('# PSU model:, {}\r\n'.format(power_supply.model).encode())
+                csv_file.write(b'\r\n')
+                csv_file.write(CSV_HEADER)
     
-                csv_writer = csv.writer(csv_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
                 psu_channel = power_supply.channels[psu_channel_no]
-                ctx = Context(stdscr, csv_writer, strip, psu_channel, num_leds, settle_time, current_offset)
-                run_measurements(ctx, mode, brightness_range, value_range, voltage_range)
+                output = OutputWriter(display, csv_file)
+                output.start()
+                try:
+                    with ThreadPoolExecutor(max_workers=1) as strip_executor:
+                        ctx = Context(output, strip, strip_executor, psu_channel, num_leds,
+                                      min_settle_time, settle_time, settle_tolerance, current_offset)
+                        run_measurements(ctx, mode, brightness_range, value_range, voltage_range)
+                finally:
+                    output.close()
         finally:
             strip.clear_strip()
             strip.cleanup()
@@ -247,26 +462,39 @@ def main():
     arg_parser.add_argument("output_file", metavar='output-file', help="CSV output file")
     arg_parser.add_argument("--mode", help="'individual' to enable each color individually, 'white' to enable all colors at once, or 'full' to cycle through all colors of the rainbow", default='individual')
     arg_parser.add_argument("--psu-port", dest='psu_port',    help="power supply port", default='/dev/ttyS0')
-    arg_parser.add_argument("--psu-channel", dest='psu_channel',    help="power supply channel", default='0')
-    arg_parser.add_argument("--strip-mosi", dest='strip_mosi', help="mosi pin number", default=10)
-    arg_parser.add_argument("--strip-sclk", dest='strip_sclk', help="sclk pin number", default=11)
+    arg_parser.add_argument("--psu-command-delay", dest='psu_command_delay_ms', help="minimum number of milliseconds between two commands sent to the power supply", type=float, default=100)
+    arg_parser.add_argument("--psu-channel", dest='psu_channel',    help="power supply channel", type=int, default=0)
+    arg_parser.add_argument("--strip-mosi", dest='strip_mosi', help="mosi pin number", type=int, default=10)
+    arg_parser.add_argument("--strip-sclk", dest='strip_sclk', help="sclk pin number", type=int, default=11)
+    arg_parser.add_argument("--strip-spi-speed", dest='strip_spi_speed_hz', help="hardware SPI clock in Hz; higher values program the strip faster, lower them if the LEDs glitch", type=int, default=8000000)
     arg_parser.add_argument("--strip-rgb-order", dest='strip_rgb_order', help="strip rgb data order", default='rgb')
-    arg_parser.add_argument("--num-leds", dest='num_leds', help="number of LEDs in strip", default=20)
-    arg_parser.add_argument("--min-brightness", dest='min_brightness', help="min global brightness to set", default=0)
-    arg_parser.add_argument("--max-brightness", dest='max_brightness', help="max global brightness to set", default=31)
-    arg_parser.add_argument("--brightness-step", dest='brightness_step', help="global brightness step size", default=1)
-    arg_parser.add_argument("--min-value", dest='min_value', help="min LED value to set", default=0)
-    arg_parser.add_argument("--max-value", dest='max_value', help="max LED value to set", default=255)
-    arg_parser.add_argument("--value-step", dest='value_step', help="LED value step size", default=1)
-    arg_parser.add_argument("--min-voltage", dest='min_voltage', help="min voltage to set", default=Default(5))
-    arg_parser.add_argument("--max-voltage", dest='max_voltage', help="max voltage to set", default=Default(5))
-    arg_parser.add_argument("--voltage-step", dest='voltage_step', help="voltage step size", default=0.25)
-    arg_parser.add_argument("--settle-time", dest='settle_time_ms', help="number of milliseconds to wait between each measurement for the current to settle", default=100)
-    arg_parser.add_argument("--current-offset", dest='current_offset', help="number of mA to deduct from the current measurements", default=0)
+    arg_parser.add_argument("--num-leds", dest='num_leds', help="number of LEDs in strip", type=int, default=20)
+    arg_parser.add_argument("--min-brightness", dest='min_brightness', help="min global brightness to set", type=int, default=0)
+    arg_parser.add_argument("--max-brightness", dest='max_brightness', help="max global brightness to set", type=int, default=31)
+    arg_parser.add_argument("--brightness-step", dest='brightness_step', help="global brightness step size", type=int, default=1)
+    arg_parser.add_argument("--min-value", dest='min_value', help="min LED value to set", type=int, default=0)
+    arg_parser.add_argument("--max-value", dest='max_value', help="max LED value to set", type=int, default=255)
+    arg_parser.add_argument("--value-step", dest='value_step', help="LED value step size", type=int, default=1)
+    arg_parser.add_argument("--min-voltage", dest='min_voltage', help="min voltage to set", type=float, default=Default(5))
+    arg_parser.add_argument("--max-voltage", dest='max_voltage', help="max voltage to set", type=float, default=Default(5))
+    arg_parser.add_argument("--voltage-step", dest='voltage_step', help="voltage step size", type=float, default=0.25)
+    arg_parser.add_argument("--min-settle-time", dest='min_settle_time_ms', help="number of milliseconds to always wait between each measurement for the current to settle", type=float, default=100)
+    arg_parser.add_argument("--settle-time", dest='settle_time_ms', help="maximum number of milliseconds to keep polling after the minimum settle time until the current has settled, 0 to take a single reading", type=float, default=100)
+    arg_parser.add_argument("--settle-tolerance", dest='settle_tolerance', help="number of mA successive current readings may differ by for the current to be considered settled", type=float, default=0.5)
+    arg_parser.add_argument("--current-offset", dest='current_offset', help="number of mA to deduct from the current measurements", type=float, default=0)
     arg_parser.add_argument("--force", action='store_true', help="don't abort if output-file already exists")
+    arg_parser.add_argument("--curses", action='store_true', help="show progress in a full-screen curses panel instead of a single status line")
     args = arg_parser.parse_args()
 
-    curses.wrapper(lambda stdscr: run(args, stdscr))
+    if args.curses:
+        import curses
+        curses.wrapper(lambda stdscr: run(args, CursesDisplay(stdscr)))
+    else:
+        display = StreamDisplay(sys.stderr)
+        try:
+            run(args, display)
+        finally:
+            display.close()
 
 if __name__ == "__main__":
     main()